@@ -1,7 +1,9 @@
 import os
+import re
+import ast
 import json
 import argparse
-import pyperclip
+import asyncio
 from rich.console import Console, Group
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
 from rich.panel import Panel
@@ -9,6 +11,40 @@ from rich.text import Text
 import hashlib
 import sys
 import datetime
+import random
+import time
+import mmap
+import stat
+import glob
+import tempfile
+import importlib.util
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to a character-based token estimate
+    tiktoken = None
+
+try:
+    import blake3
+except ImportError:  # Optional: fall back to hashlib's SHA-256
+    blake3 = None
+
+try:
+    import orjson
+except ImportError:  # Optional: fall back to the standard json module
+    orjson = None
+
+try:
+    import liburing
+except ImportError:  # Optional: --io-uring falls back to regular file reads
+    liburing = None
+
+try:
+    import re2 as fast_re
+except ImportError:  # Optional: fall back to the backtracking re module
+    fast_re = re
 
 # Create summary directory if it doesn't exist
 SUMMARY_DIR = "summary"
@@ -17,13 +53,15 @@ if not os.path.exists(SUMMARY_DIR):
 
 # Update file paths to be stored in the summary folder
 HASH_CACHE_FILE = os.path.join(SUMMARY_DIR, "hash_cache.json")   # Stores file-level hashes and old summaries
-SUMMARIES_OUTPUT = os.path.join(SUMMARY_DIR, "summaries.json")      # Final combined summaries
+SUMMARIES_OUTPUT = os.path.join(SUMMARY_DIR, "summaries.jsonl")    # Chunk summaries, one JSON record per line
+SUMMARIES_MANIFEST = os.path.join(SUMMARY_DIR, "summaries.manifest.json")  # Repository map and run metadata
+CHUNK_CACHE_FILE = os.path.join(SUMMARY_DIR, "chunk_cache.json")   # Maps chunk content hashes to summaries
 
 # Initialize rich console
 console = Console()
 
 # Constants
-EXCLUDED_DIRS = {
+EXCLUDED_DIRS = frozenset({
     "migrations",
     "static",
     "media",
@@ -33,12 +71,147 @@ EXCLUDED_DIRS = {
     "docs",
     "node_modules",
     "summary",   # Exclude the summary folder from scanning
-}
-EXCLUDED_EXTENSIONS = {
-    ".pyc", ".css", ".scss", ".png", ".jpg", ".jpeg", ".svg", ".sqlite3"
-}
-EXCLUDED_FILES = {"manage.py", "wsgi.py", "asgi.py", "package-lock.json"}
-VALID_EXTENSIONS = {".py", ".js", ".html", ".json", ".tsx", ".jsx"}
+})
+EXCLUDED_FILES = frozenset({"manage.py", "wsgi.py", "asgi.py", "package-lock.json"})
+VALID_EXTENSIONS = frozenset({".py", ".js", ".html", ".json", ".tsx", ".jsx"})
+VALID_EXT_TUPLE = tuple(VALID_EXTENSIONS)   # For a single str.endswith() check
+DEFAULT_MAX_WORKERS = 16   # Maximum number of concurrent OpenAI requests
+DEFAULT_RPM = 500          # Requests per minute allowed by the OpenAI account
+DEFAULT_TPM = 30000        # Tokens per minute allowed by the OpenAI account
+OUTPUT_TOKENS_ESTIMATE = 400  # Output tokens reserved for a request that sets no max_tokens
+MAX_RETRIES = 5            # Attempts per request before giving up on a chunk
+BACKOFF_BASE = 1.0         # Seconds; doubled on every retry
+BACKOFF_CAP = 30.0         # Maximum backoff delay in seconds (before jitter)
+DEFAULT_BATCH_TOKENS = 6000  # Token budget for chunks packed into one request
+BATCH_MAX_CHUNKS = 16        # Chunks packed into one request, so the reply fits its output budget
+BATCH_OUTPUT_TOKENS_PER_CHUNK = 400  # Output tokens reserved per chunk in a batched reply
+HTTP_MAX_CONNECTIONS = 64    # Keep-alive connections pooled by the shared OpenAI client
+CHEAP_SUMMARY_MAX_LINES = 10  # Chunks up to this many non-blank lines may skip the LLM
+CHEAP_SUMMARY_MAX_KEYS = 20   # JSON chunks with up to this many top-level keys skip the LLM
+CHEAP_SUMMARY_MAX_CHARS = 300 # Local summaries longer than this go to the LLM instead
+DEFAULT_MODEL = "gpt-4o-mini"  # Model used for short, simple chunks
+ESCALATE_MODEL = "gpt-4o"      # Model used for long or complex chunks
+ROUTER_MAX_TOKENS = 800        # Chunks with at least this many tokens are escalated
+ROUTER_MAX_AST_NODES = 50      # Python chunks with at least this many AST nodes are escalated
+GENERATED_HEADER_LINES = 10    # Leading lines of a file searched for a generated-code marker
+GENERATED_SUMMARY = "Generated code (file header contains a generated-code marker); not summarized."
+HASH_READ_SIZE = 1 << 20     # 1 MiB reads when hashing files
+SUMMARIES_BUFFER_SIZE = 1 << 20  # Write buffer for the streamed summaries file
+LINES_PER_CHUNK = 30             # Lines per chunk sent for summarizing
+PARALLEL_PREPARE_MIN_BYTES = 256 << 20  # Below this much source, hashing/chunking stays in-process
+PARALLEL_PREPARE_CHUNKSIZE = 16         # Files handed to a pool worker at a time
+HASH_MMAP_THRESHOLD = 8 << 20  # Files larger than 8 MiB are hashed via mmap
+IO_URING_QUEUE_DEPTH = 256    # Files opened/read/closed per io_uring submission
+IO_URING_TIMEOUT = 10         # Seconds to wait for a single io_uring completion
+HASH_ALGORITHM = "blake3" if blake3 is not None else "sha256"
+HASH_CACHE_VERSION_KEY = "__hash_algorithm__"  # Cache entries from another algorithm are discarded
+
+def read_json_file(path):
+    """
+    Load JSON from path, using orjson when available.
+    """
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def write_json_file(path, data):
+    """
+    Write data to path as indented JSON, using orjson when available.
+    """
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+def encode_json_line(record):
+    """
+    Encode record as a single line of JSON bytes, using orjson when available.
+    """
+    if orjson is not None:
+        return orjson.dumps(record) + b"\n"
+    return json.dumps(record).encode("utf-8") + b"\n"
+
+def _current_umask():
+    """
+    Return the process umask (os.umask can only be read by setting it).
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+class SummaryWriter:
+    """
+    Streams summary records as JSON lines as soon as they are available, so memory
+    use stays flat and partial results survive a crash.
+    Records go to a per-run "<path>.<id>.partial" file, which replaces path only when
+    the run completes; an interrupted run leaves path and its partial file in place.
+    The completed output gets the usual umask-derived mode rather than mkstemp's 0600.
+    """
+    def __init__(self, path=SUMMARIES_OUTPUT):
+        self.path = path
+        self.partial_path = None
+        self.count = 0
+        self.latest = None
+        self._file = None
+
+    def __enter__(self):
+        directory, name = os.path.split(self.path)
+        fd, self.partial_path = tempfile.mkstemp(
+            prefix=name + ".", suffix=".partial", dir=directory or "."
+        )
+        self._file = os.fdopen(fd, "wb", buffering=SUMMARIES_BUFFER_SIZE)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._file.close()
+        if exc_type is None:
+            os.chmod(self.partial_path, 0o666 & ~_current_umask())
+            os.replace(self.partial_path, self.path)
+
+    def write(self, file_path, entry, key=None):
+        """
+        Write one {chunk_id, summary, snippets} entry for file_path.
+        key is the chunk hash, recorded so an interrupted run can be resumed.
+        """
+        record = {"file": file_path, **entry}
+        if key is not None:
+            record["chunk_hash"] = key
+        self._file.write(encode_json_line(record))
+        self.count += 1
+        self.latest = entry["summary"]
+
+def partial_summary_files(path=SUMMARIES_OUTPUT):
+    """
+    List the partial summary files left behind by interrupted runs.
+    """
+    return sorted(glob.glob(glob.escape(path) + ".*.partial"))
+
+def load_summary_records(path=SUMMARIES_OUTPUT):
+    """
+    Read chunk summaries written by previous runs: the last completed output at path
+    plus the partial files of any interrupted runs.
+    Returns a dict in the chunk cache format: { chunk_hash: { 'summary': <str>, 'snippets': [ ... ] } }
+    """
+    records = {}
+    for record_path in [path] + partial_summary_files(path):
+        if not os.path.exists(record_path):
+            continue
+        with open(record_path, "rb") as f:
+            for line in f:
+                try:
+                    record = orjson.loads(line) if orjson is not None else json.loads(line)
+                except ValueError:
+                    continue  # Truncated final line from a crash
+                if "chunk_hash" in record:
+                    records[record["chunk_hash"]] = {
+                        "summary": record["summary"],
+                        "snippets": record.get("snippets", [])
+                    }
+    return records
 
 def update_gitignore(repo_path):
     """
@@ -68,94 +241,574 @@ def valid_source_file(file_path):
     """
     Check if the file is a valid source file based on its extension and name.
     """
-    _, ext = os.path.splitext(file_path)
     filename = os.path.basename(file_path)
-    
-    return (
-        ext.lower() in VALID_EXTENSIONS
-        and ext.lower() not in EXCLUDED_EXTENSIONS
-        and filename not in EXCLUDED_FILES
-    )
+    return filename not in EXCLUDED_FILES and filename.lower().endswith(VALID_EXT_TUPLE)
+
+def walk_repo(repo_path, max_depth=10):
+    """
+    Walk the repo once with os.scandir, collecting valid source files and the
+    hierarchical repository map (limited to max_depth levels) in the same pass.
+    Returns (files, repo_map) where files is a list of (file_path, stat_result) tuples.
+    Skips excluded directories and files, and anything that is not a regular file.
+    """
+    files = []
+    repo_map = {
+        'name': os.path.basename(repo_path),
+        'type': 'directory',
+        'path': '.',
+        'children': []
+    }
+
+    def traverse(current_path, node, current_depth=0):
+        try:
+            with os.scandir(current_path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name in EXCLUDED_DIRS:
+                            continue
+                        child = None
+                        if node is not None and current_depth < max_depth:
+                            child = {
+                                'name': entry.name,
+                                'type': 'directory',
+                                'path': os.path.relpath(entry.path, repo_path),
+                                'children': []
+                            }
+                            node['children'].append(child)
+                        traverse(entry.path, child, current_depth + 1)
+                    elif valid_source_file(entry.name):
+                        try:
+                            stat_result = entry.stat()
+                        except OSError:
+                            continue  # e.g. a broken symlink
+                        if not stat.S_ISREG(stat_result.st_mode):
+                            continue  # e.g. a symlink to a directory named like a source file
+                        files.append((entry.path, stat_result))
+                        if node is not None and current_depth < max_depth:
+                            node['children'].append({
+                                'name': entry.name,
+                                'type': 'file',
+                                'path': os.path.relpath(entry.path, repo_path)
+                            })
+        except Exception as e:
+            console.print(f"[yellow]⚠️ Directory traversal error: {str(e)}[/yellow]")
+
+    traverse(repo_path, repo_map)
+    return files, repo_map
 
 def scan_repo(repo_path):
     """
     Recursively walk the repo and return a list of valid source file paths.
     Skips excluded directories and files.
     """
-    file_paths = []
-    try:
-        for root, dirs, files in os.walk(repo_path):
-            # Filter directories
-            dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRS]
-            
-            for f in files:
-                fp = os.path.join(root, f)
-                if valid_source_file(fp):
-                    file_paths.append(fp)
-    except Exception as e:
-        console.print(f"[red]Error during repository scan: {str(e)}[/red]")
-    
-    return file_paths
+    files, _ = walk_repo(repo_path)
+    return [file_path for file_path, _ in files]
 
 def chunk_file(file_path, lines_per_chunk=50):
     """
     Splits the file content into chunks of N lines.
+    Chunks are sliced straight out of the file text at newline offsets,
+    so no per-line strings are created.
     """
     with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-        content = f.readlines()
+        text = f.read()
 
-    chunks = []
-    for i in range(0, len(content), lines_per_chunk):
-        chunk_lines = content[i:i+lines_per_chunk]
-        chunks.append("".join(chunk_lines))
-    return chunks
+    offsets = [0]
+    pos = 0
+    end = len(text)
+    while pos < end:
+        for _ in range(lines_per_chunk):
+            pos = text.find("\n", pos) + 1
+            if pos == 0:
+                pos = end
+                break
+        offsets.append(pos)
+    return [text[offsets[k]:offsets[k + 1]] for k in range(len(offsets) - 1)]
 
-def calculate_file_hash(file_path):
+def new_file_hasher():
     """
-    Compute a hash (SHA-256) for the file content.
+    Create a hasher for HASH_ALGORITHM (BLAKE3 if installed, otherwise SHA-256).
     """
-    hasher = hashlib.sha256()
+    if blake3 is not None:
+        return blake3.blake3()
+    return hashlib.sha256()
+
+def calculate_file_hash(file_path, size=None):
+    """
+    Compute a hash (BLAKE3 if installed, otherwise SHA-256) for the file content.
+    The hash is only used for change detection, not for security.
+    size may be passed from an earlier stat() to skip the fstat call.
+    """
+    hasher = new_file_hasher()
     try:
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                hasher.update(chunk)
+        # Raw file descriptor: no BufferedReader copy and no isatty/lseek probes
+        fd = os.open(file_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            if size is None:
+                size = os.fstat(fd).st_size
+            if size <= HASH_READ_SIZE:
+                # One read covers the whole file; the spare byte detects growth since stat()
+                data = os.read(fd, size + 1)
+                hasher.update(data)
+                if len(data) > size:
+                    for chunk in iter(lambda: os.read(fd, HASH_READ_SIZE), b""):
+                        hasher.update(chunk)
+            elif blake3 is not None:
+                # Let blake3 map the file and hash it with multithreaded tree hashing
+                hasher = blake3.blake3(max_threads=blake3.blake3.AUTO)
+                hasher.update_mmap(file_path)
+            elif size > HASH_MMAP_THRESHOLD:
+                with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                    hasher.update(mm)
+            else:
+                for chunk in iter(lambda: os.read(fd, HASH_READ_SIZE), b""):
+                    hasher.update(chunk)
+        finally:
+            os.close(fd)
         return hasher.hexdigest()
     except Exception as e:
         console.print(f"[red]Error reading file for hashing: {file_path} - {e}[/red]")
         return None
 
+def _uring_submit_all(ring, cqe, count, prepare, results=None):
+    """
+    Prepare count SQEs with prepare(sqe, i), submit them in one call and
+    wait for all completions. Returns {i: result} for each entry.
+    Completions are stored in results as they are reaped, so a caller passing
+    its own dict still sees them if this raises part way through.
+    Raises OSError if any completion takes longer than IO_URING_TIMEOUT seconds.
+    """
+    for i in range(count):
+        sqe = liburing.io_uring_get_sqe(ring)
+        prepare(sqe, i)
+        sqe.user_data = i
+    liburing.io_uring_submit(ring)
+    if results is None:
+        results = {}
+    while len(results) < count:
+        # Reap one completion at a time so the CQ head is always tracked correctly
+        liburing.io_uring_wait_cqe_timeout(ring, cqe, liburing.timespec(IO_URING_TIMEOUT))
+        entry = cqe[0]
+        results[entry.user_data] = entry.res
+        liburing.io_uring_cqe_seen(ring, entry)
+    return results
+
+def hash_files_io_uring(file_entries):
+    """
+    Hash small files using batched io_uring open/read/close submissions, so each
+    batch of IO_URING_QUEUE_DEPTH files costs a few syscalls instead of several per file.
+    Takes (file_path, stat_result) tuples and returns {file_path: hash} for the files
+    it could read (up to HASH_READ_SIZE bytes each), or None if io_uring is unavailable.
+    """
+    if liburing is None or not sys.platform.startswith("linux"):
+        return None
+
+    small = [(path, st.st_size) for path, st in file_entries if st.st_size <= HASH_READ_SIZE]
+    hashes = {}
+    ring = liburing.Ring()
+    cqe = liburing.Cqe()
+    try:
+        liburing.io_uring_queue_init(IO_URING_QUEUE_DEPTH, ring)
+    except Exception as e:
+        console.print(f"[yellow]⚠️ io_uring unavailable: {e}[/yellow]")
+        return None
+    open_fds = set()  # Opened by the ring and not yet closed, so a failure can close them
+    try:
+        for start in range(0, len(small), IO_URING_QUEUE_DEPTH):
+            batch = small[start:start + IO_URING_QUEUE_DEPTH]
+            opened = {}
+            try:
+                _uring_submit_all(
+                    ring, cqe, len(batch),
+                    lambda sqe, i: liburing.io_uring_prep_open(sqe, batch[i][0], liburing.O_RDONLY),
+                    opened
+                )
+            finally:
+                open_fds.update(fd for fd in opened.values() if fd >= 0)
+            fds = [(i, opened[i]) for i in range(len(batch)) if opened[i] >= 0]
+            # One spare byte detects files that grew since they were scanned
+            buffers = [bytearray(batch[i][1] + 1) for i, _ in fds]
+            reads = _uring_submit_all(
+                ring, cqe, len(fds),
+                lambda sqe, j: liburing.io_uring_prep_read(sqe, fds[j][1], buffers[j], 0)
+            )
+            closed = {}
+            try:
+                _uring_submit_all(
+                    ring, cqe, len(fds),
+                    lambda sqe, j: liburing.io_uring_prep_close(sqe, fds[j][1]),
+                    closed
+                )
+            finally:
+                open_fds.difference_update(fds[j][1] for j in closed)
+            for j, (i, _) in enumerate(fds):
+                path, size = batch[i]
+                if 0 <= reads[j] <= size:
+                    hasher = new_file_hasher()
+                    hasher.update(memoryview(buffers[j])[:reads[j]])
+                    hashes[path] = hasher.hexdigest()
+    except Exception as e:
+        console.print(f"[yellow]⚠️ io_uring hashing failed, falling back to regular reads: {e}[/yellow]")
+    finally:
+        liburing.io_uring_queue_exit(ring)
+        for fd in open_fds:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+    return hashes
+
+_WORKER_CACHED_HASHES = {}
+
+def _init_prepare_worker(cached_hashes):
+    """
+    Pool initializer: give each worker the cached file hashes once, up front.
+    """
+    global _WORKER_CACHED_HASHES
+    _WORKER_CACHED_HASHES = cached_hashes
+
+def _prepare_file(item, cached_hashes=None):
+    """
+    Hash one (file_path, size, known_hash) item and chunk the file if it changed.
+    Returns (file_path, hash, chunks), where chunks is None for unchanged files.
+    """
+    if cached_hashes is None:
+        cached_hashes = _WORKER_CACHED_HASHES
+    file_path, size, current_hash = item
+    if current_hash is None:
+        current_hash = calculate_file_hash(file_path, size)
+    if current_hash and current_hash == cached_hashes.get(file_path):
+        return file_path, current_hash, None
+    return file_path, current_hash, chunk_file(file_path, lines_per_chunk=LINES_PER_CHUNK)
+
+def prepare_files(items, cached_hashes):
+    """
+    Hash and, if changed, chunk each (file_path, size, known_hash) item.
+    Yields (file_path, hash, chunks) in order, with chunks None for unchanged files.
+    Files are handled on a thread pool; hashlib/blake3 release the GIL, so threads
+    overlap I/O and hashing. Only repos with PARALLEL_PREPARE_MIN_BYTES of source
+    use a process pool, since each spawned worker costs a fresh interpreter start.
+    Workers receive cached_hashes through the pool initializer so unchanged files
+    only send back a hash.
+    """
+    cpus = os.cpu_count() or 1
+    workers = min(cpus, len(items) // PARALLEL_PREPARE_CHUNKSIZE)
+    if workers < 2 or sum(size for _, size, _ in items) < PARALLEL_PREPARE_MIN_BYTES:
+        with ThreadPoolExecutor(max_workers=min(32, cpus * 4)) as executor:
+            yield from executor.map(lambda item: _prepare_file(item, cached_hashes), items)
+        return
+    # spawn: forking a process with live rich/asyncio threads is not safe
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(workers, initializer=_init_prepare_worker, initargs=(cached_hashes,)) as pool:
+        yield from pool.imap(_prepare_file, items, chunksize=PARALLEL_PREPARE_CHUNKSIZE)
+
 def load_hash_cache():
     """
     Load existing hash/summaries from HASH_CACHE_FILE, if exists.
     Returns a dict: { file_path: { 'hash': <str>, 'summaries': [ {chunk_id, summary} ... ] } }
+    A cache written with a different hash algorithm is discarded.
     """
     if not os.path.exists(HASH_CACHE_FILE):
         return {}
     try:
-        with open(HASH_CACHE_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+        cache_data = read_json_file(HASH_CACHE_FILE)
     except:
         console.print(f"[red]Error loading hash cache from file {HASH_CACHE_FILE}[/red]")
         return {}
+    if cache_data.pop(HASH_CACHE_VERSION_KEY, "sha256") != HASH_ALGORITHM:
+        console.print("[yellow]Hash algorithm changed; rebuilding hash cache.[/yellow]")
+        return {}
+    return cache_data
 
 def save_hash_cache(cache_data):
     """
-    Save hash cache to file.
+    Save hash cache to file, tagged with the hash algorithm used.
     """
-    with open(HASH_CACHE_FILE, "w", encoding="utf-8") as f:
-        json.dump(cache_data, f, indent=2)
+    write_json_file(HASH_CACHE_FILE, {HASH_CACHE_VERSION_KEY: HASH_ALGORITHM, **cache_data})
 
-def summarize_chunk(chunk, progress=None):
+def chunk_hash(chunk):
     """
-    Summarize a code chunk using OpenAI's GPT-4 model and extract short snippet references.
-    Returns a dict with 'summary' (str) and 'snippets' (list).
+    Compute the SHA-256 key used to look up a chunk in the chunk cache.
     """
-    from openai import OpenAI
-    import json
-    import os
-    
-    client = OpenAI()
+    return hashlib.sha256(chunk.encode("utf-8", errors="ignore")).hexdigest()
+
+def load_chunk_cache():
+    """
+    Load existing chunk summaries from CHUNK_CACHE_FILE, if exists.
+    Returns a dict: { chunk_hash: { 'summary': <str>, 'snippets': [ ... ] } }
+    """
+    if not os.path.exists(CHUNK_CACHE_FILE):
+        return {}
+    try:
+        return read_json_file(CHUNK_CACHE_FILE)
+    except:
+        console.print(f"[red]Error loading chunk cache from file {CHUNK_CACHE_FILE}[/red]")
+        return {}
+
+def save_chunk_cache(cache_data):
+    """
+    Save chunk cache to file.
+    """
+    write_json_file(CHUNK_CACHE_FILE, cache_data)
+
+_HTML_HEADING_RE = re.compile(r"<(title|h1)[^>]*>(.*?)</\1>", re.IGNORECASE | re.DOTALL)
+# Compiled with re2 (linear-time DFA) when installed; run on every chunk
+# A generated-code marker must open a comment line: "// Code generated ... DO NOT EDIT.",
+# "# @generated" or a bare "/* DO NOT EDIT */"; prose that merely mentions the words is ignored
+_GENERATED_RE = fast_re.compile(
+    r"(?m)^[ \t]*(?:#|//|/?\*+|<!--)[ \t]*"
+    r"(?:@generated\b|Code generated\b.*\bDO NOT EDIT\b|DO NOT EDIT\b[.!]?[ \t]*(?:\*/|-->)?[ \t]*$)"
+)
+_MINIFIED_RE = fast_re.compile(r"[^\n]{500,}")
+_SIMPLE_PY_NODES = (ast.Import, ast.ImportFrom, ast.Assign, ast.AnnAssign, ast.Pass)
+_PY_DEF_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+def _first_line(text):
+    return text.strip().splitlines()[0].rstrip(".") if text and text.strip() else ""
+
+def _join_names(names, limit=10):
+    if len(names) > limit:
+        return ", ".join(names[:limit]) + f" and {len(names) - limit} more"
+    return ", ".join(names)
 
+def _is_literal(node):
+    try:
+        ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return False
+    return True
+
+def _cheap_python_summary(chunk, short):
+    try:
+        tree = ast.parse(chunk, mode="exec")
+    except (SyntaxError, ValueError):
+        return None
+
+    imports, names, defs = [], [], []
+    for node in tree.body:
+        if isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant):
+            continue  # docstring or bare constant
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            imports.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.Assign):
+            if not _is_literal(node.value):
+                return None  # Computed values are worth a real summary
+            names.extend(t.id for t in node.targets if isinstance(t, ast.Name))
+        elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+            if node.value is not None and not _is_literal(node.value):
+                return None
+            names.append(node.target.id)
+        elif isinstance(node, _PY_DEF_NODES):
+            kind = "class" if isinstance(node, ast.ClassDef) else "function"
+            doc = _first_line(ast.get_docstring(node))
+            defs.append(f"{kind} {node.name}" + (f" ({doc})" if doc else ""))
+        elif not isinstance(node, _SIMPLE_PY_NODES):
+            return None  # Top-level control flow is worth a real summary
+    # Only import blocks skip the LLM regardless of length
+    if (defs or names) and not short:
+        return None
+
+    parts = []
+    docstring = _first_line(ast.get_docstring(tree))
+    if docstring:
+        parts.append(docstring + ".")
+    if imports:
+        parts.append("Imports " + _join_names(imports) + ".")
+    if defs:
+        parts.append("Defines " + _join_names(defs) + ".")
+    if names:
+        parts.append("Assigns " + _join_names(names) + ".")
+    summary = " ".join(parts)
+    if not summary or len(summary) > CHEAP_SUMMARY_MAX_CHARS:
+        return None
+    return summary
+
+def is_generated_file(chunks):
+    """
+    Check whether a file is generated code: one of its first GENERATED_HEADER_LINES
+    lines (always within the first chunk) is a comment opening with a generated-code marker.
+    """
+    if not chunks:
+        return False
+    header = "\n".join(chunks[0].splitlines()[:GENERATED_HEADER_LINES])
+    return _GENERATED_RE.search(header) is not None
+
+def classify_chunk(chunk):
+    """
+    Flag chunks that contain minified (500+ character) lines.
+    Returns a dict with a boolean 'minified' key.
+    """
+    return {
+        "minified": _MINIFIED_RE.search(chunk) is not None
+    }
+
+def cheap_summary(chunk, ext):
+    """
+    Try to summarize a tiny or trivially structured chunk locally.
+    Returns a summary string, or None to defer to the LLM.
+    """
+    short = sum(1 for line in chunk.splitlines() if line.strip()) <= CHEAP_SUMMARY_MAX_LINES
+
+    if ext == ".py":
+        return _cheap_python_summary(chunk, short)
+
+    if ext == ".json":
+        try:
+            data = json.loads(chunk)
+        except ValueError:
+            return None
+        if isinstance(data, dict) and len(data) <= CHEAP_SUMMARY_MAX_KEYS:
+            return "JSON with keys: " + ", ".join(data) if data else "Empty JSON object."
+        if isinstance(data, list) and short:
+            return f"JSON array with {len(data)} items."
+        return None
+
+    if ext == ".html" and short:
+        titles = [" ".join(text.split()) for _, text in _HTML_HEADING_RE.findall(chunk)]
+        titles = [title for title in titles if title]
+        if titles:
+            return "HTML with heading(s): " + ", ".join(titles)
+
+    return None
+
+_ENCODING = None
+
+def count_tokens(text):
+    """
+    Count the prompt tokens in text using tiktoken.
+    Falls back to a rough 4-characters-per-token estimate if tiktoken is unavailable.
+    """
+    global _ENCODING
+    if tiktoken is not None and _ENCODING is None:
+        try:
+            _ENCODING = tiktoken.encoding_for_model("gpt-4o")
+        except Exception:
+            _ENCODING = False
+    if _ENCODING:
+        return len(_ENCODING.encode(text))
+    return len(text) // 4 + 1
+
+class RateLimiter:
+    """
+    Token-bucket limiter shared by all concurrent requests.
+    Keeps requests per minute (rpm) and tokens per minute (tpm) below the account limits.
+    """
+    def __init__(self, rpm=DEFAULT_RPM, tpm=DEFAULT_TPM):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    async def acquire(self, tokens):
+        """
+        Wait until one request and the given number of tokens are available, then reserve them.
+        """
+        # A request larger than the whole bucket only waits for a full bucket
+        tokens = min(tokens, self.tpm)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._requests >= 1 and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep(max(
+                    (1 - self._requests) * 60 / self.rpm,
+                    (tokens - self._tokens) * 60 / self.tpm
+                ))
+
+_OPENAI_CLIENT = None
+
+def get_client(api_key=None):
+    """
+    Return the shared AsyncOpenAI client, creating it on first use.
+    Reusing one client keeps its HTTP connections alive across requests
+    instead of paying a new TLS handshake per chunk. HTTP/2 is used when
+    the h2 package is installed.
+    """
+    global _OPENAI_CLIENT
+    if _OPENAI_CLIENT is None:
+        import httpx
+        from openai import AsyncOpenAI
+
+        _OPENAI_CLIENT = AsyncOpenAI(
+            api_key=api_key,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_CONNECTIONS
+                ),
+                http2=importlib.util.find_spec("h2") is not None
+            )
+        )
+    return _OPENAI_CLIENT
+
+async def close_client():
+    """
+    Close the shared AsyncOpenAI client, if one was created.
+    """
+    global _OPENAI_CLIENT
+    if _OPENAI_CLIENT is not None:
+        await _OPENAI_CLIENT.close()
+        _OPENAI_CLIENT = None
+
+async def _request_completion(client, limiter, **kwargs):
+    """
+    Call client.chat.completions.create, respecting the rate limiter and
+    retrying transient errors with exponential backoff and jitter.
+    Each attempt reserves the prompt tokens plus max_tokens (or OUTPUT_TOKENS_ESTIMATE),
+    since output tokens count toward the TPM limit too.
+    The last error is re-raised once MAX_RETRIES attempts have failed.
+    """
+    from openai import RateLimitError, APIConnectionError, APITimeoutError, InternalServerError
+
+    tokens = sum(count_tokens(m["content"]) for m in kwargs["messages"])
+    tokens += kwargs.get("max_tokens") or OUTPUT_TOKENS_ESTIMATE
+    for attempt in range(MAX_RETRIES):
+        await limiter.acquire(tokens)
+        try:
+            return await client.chat.completions.create(**kwargs)
+        except (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError) as e:
+            if attempt == MAX_RETRIES - 1:
+                raise
+            delay = min(BACKOFF_BASE * 2 ** attempt, BACKOFF_CAP) + random.random()
+            console.print(f"[yellow]⚠️ {type(e).__name__}, retrying in {delay:.1f}s ({attempt + 1}/{MAX_RETRIES - 1})[/yellow]")
+            await asyncio.sleep(delay)
+
+def choose_model(chunk, ext, default_model=DEFAULT_MODEL, escalate_model=ESCALATE_MODEL, flags=None):
+    """
+    Pick the model for a chunk: default_model for short, simple chunks and
+    escalate_model for long ones or Python chunks with many AST nodes.
+    Minified chunks (per classify_chunk flags) stay on default_model however long
+    they are, since the larger model adds little for them.
+    """
+    if flags is not None and flags["minified"]:
+        return default_model
+    if count_tokens(chunk) >= ROUTER_MAX_TOKENS:
+        return escalate_model
+    if ext == ".py":
+        try:
+            complexity = sum(1 for _ in ast.walk(ast.parse(chunk)))
+        except (SyntaxError, ValueError):
+            complexity = 0  # Partial chunk; judge it by length alone
+        if complexity >= ROUTER_MAX_AST_NODES:
+            return escalate_model
+    return default_model
+
+async def summarize_chunk(chunk, limiter, model=ESCALATE_MODEL):
+    """
+    Summarize a code chunk using the given OpenAI model and extract short snippet references.
+    Returns a dict with 'summary' (str) and 'snippets' (list), or None if the request failed.
+    """
     prompt_text = f"""You are an expert code reviewer. For the given code file, please:
 
 1. Provide a concise summary of its main purpose and functionality. If applicable, mention its role within the larger project or any interactions with other parts of the codebase.
@@ -172,11 +825,10 @@ Code chunk:
 {chunk}"""
 
     try:
-        if progress:
-            progress.update(progress.task_ids[-1], description="[yellow]🤔 Analyzing with AI...[/yellow]")
-
-        completion = client.chat.completions.create(
-            model="gpt-4o",
+        completion = await _request_completion(
+            get_client(),
+            limiter,
+            model=model,
             messages=[
                 {"role": "user", "content": prompt_text}
             ]
@@ -200,57 +852,129 @@ Code chunk:
     except Exception as e:
         error_msg = f"Error summarizing chunk: {str(e)}"
         console.print(f"[red]❌ {error_msg}[/red]")
-        return {
-            "summary": error_msg,
-            "snippets": []
-        }
+        return None
 
-def generate_repo_map(repo_path, max_depth=10):
+def batch_chunks(chunks, max_tokens=DEFAULT_BATCH_TOKENS, max_chunks=BATCH_MAX_CHUNKS):
     """
-    Generate hierarchical repository structure with depth limiting
+    Greedily pack (file, chunk_id, chunk_text, ...) tuples into batches whose
+    combined chunk_text token count stays within max_tokens, with at most
+    max_chunks chunks per batch.
+    A chunk larger than max_tokens is placed in a batch of its own.
     """
-    repo_map = {
-        'name': os.path.basename(repo_path),
-        'type': 'directory',
-        'path': '.',
-        'children': []
-    }
-    
-    def traverse(current_path, node, current_depth=0):
-        if current_depth >= max_depth:
-            return
+    batches = []
+    current = []
+    current_tokens = 0
+    for item in chunks:
+        tokens = count_tokens(item[2])
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_chunks):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(item)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+async def summarize_batch(chunks, limiter, model=ESCALATE_MODEL):
+    """
+    Summarize several code chunks with a single OpenAI request.
+    Returns a list aligned with chunks, holding a dict with 'summary' and 'snippets'
+    for each chunk, or None for chunks that could not be summarized.
+    Chunks missing from the batched reply (e.g. a truncated or malformed response,
+    or a request rejected as too large) are retried one at a time with summarize_chunk.
+    If the request itself failed after _request_completion's retries, no chunk is retried.
+    """
+    if len(chunks) == 1:
+        return [await summarize_chunk(chunks[0], limiter, model)]
+
+    sections = "\n\n".join(
+        f"### Chunk {i}\n{chunk}" for i, chunk in enumerate(chunks)
+    )
+    prompt_text = f"""You are an expert code reviewer. You are given {len(chunks)} numbered code chunks. For each chunk, please:
+
+1. Provide a concise summary of its main purpose and functionality. If applicable, mention its role within the larger project or any interactions with other parts of the codebase.
+
+2. Identify and provide short code snippets (up to 5 lines each) that represent key elements, such as important function or class definitions, or critical logic. Focus on unique or significant parts of the code, avoiding trivial or boilerplate sections.
+
+3. Output your response as a JSON object with a single field "results": an array containing one object per chunk with the following fields:
+   - "id": the chunk number
+   - "summary": a string containing the summary
+   - "snippets": an array of strings, each being a code snippet
+
+Ensure that the summary and snippets together give a clear and informative overview of each chunk.
+
+{sections}"""
+
+    from openai import BadRequestError
+
+    results = [None] * len(chunks)
+    try:
+        completion = await _request_completion(
+            get_client(),
+            limiter,
+            model=model,
+            messages=[
+                {"role": "user", "content": prompt_text}
+            ],
+            response_format={"type": "json_object"},
+            max_tokens=BATCH_OUTPUT_TOKENS_PER_CHUNK * len(chunks)
+        )
+    except BadRequestError as e:
+        # e.g. the batch overflows the context window; the chunks may still fit one at a time
+        console.print(f"[red]❌ Batch of {len(chunks)} chunks was rejected: {str(e)}[/red]")
+        completion = None
+    except Exception as e:
+        # Retries are exhausted or the error is not retryable; per-chunk requests would fail the same way
+        console.print(f"[red]❌ Error summarizing batch of {len(chunks)} chunks: {str(e)}[/red]")
+        return results
+
+    if completion is not None:
         try:
-            with os.scandir(current_path) as entries:
-                for entry in entries:
-                    if entry.name in EXCLUDED_DIRS:
-                        continue
-                    
-                    if entry.is_dir():
-                        child = {
-                            'name': entry.name,
-                            'type': 'directory',
-                            'path': os.path.relpath(entry.path, repo_path),
-                            'children': []
-                        }
-                        node['children'].append(child)
-                        traverse(entry.path, child, current_depth + 1)
-                    elif valid_source_file(entry.path):
-                        node['children'].append({
-                            'name': entry.name,
-                            'type': 'file',
-                            'path': os.path.relpath(entry.path, repo_path)
-                        })
+            parsed = json.loads(completion.choices[0].message.content)
+            entries = parsed.get("results", []) if isinstance(parsed, dict) else parsed
+            for entry in entries if isinstance(entries, list) else []:
+                if not isinstance(entry, dict):
+                    continue
+                try:
+                    idx = int(entry.get("id"))
+                except (TypeError, ValueError):
+                    continue
+                if 0 <= idx < len(chunks):
+                    results[idx] = {
+                        "summary": entry.get("summary", ""),
+                        "snippets": entry.get("snippets", [])
+                    }
         except Exception as e:
-            console.print(f"[yellow]⚠️ Directory traversal error: {str(e)}[/yellow]")
-    
-    traverse(repo_path, repo_map)
-    return repo_map
+            console.print(f"[red]❌ Could not parse reply for batch of {len(chunks)} chunks: {str(e)}[/red]")
+
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        console.print(f"[yellow]⚠️ Batch reply missed {len(missing)} of {len(chunks)} chunks; summarizing them individually.[/yellow]")
+        for i in missing:
+            results[i] = await summarize_chunk(chunks[i], limiter, model)
+    return results
 
-def process_repository(repo_path, context_size, api_key):
+def process_repository(repo_path, context_size, api_key, max_workers=DEFAULT_MAX_WORKERS,
+                       rpm=DEFAULT_RPM, tpm=DEFAULT_TPM, batch_tokens=DEFAULT_BATCH_TOKENS,
+                       io_uring=False, resume=False, default_model=DEFAULT_MODEL,
+                       escalate_model=ESCALATE_MODEL, copy_to_clipboard=True):
     """
     Process the repository at the given path.
     This contains the main logic previously in the main() function.
     """
+    asyncio.run(_process_async(
+        repo_path, context_size, api_key, max_workers, rpm, tpm, batch_tokens, io_uring, resume,
+        default_model, escalate_model, copy_to_clipboard
+    ))
+
+async def _process_async(repo_path, context_size, api_key, max_workers, rpm, tpm, batch_tokens,
+                         io_uring, resume, default_model, escalate_model, copy_to_clipboard):
+    """
+    Async implementation of process_repository.
+    Chunks from every changed file are packed into batches of up to batch_tokens
+    tokens and summarized concurrently, with at most max_workers requests in flight at once.
+    """
     welcome_panel = Panel.fit(
          Text("🚀 Repository Summarizer", justify="center", style="bold cyan"),
          subtitle="Let's make your code talk to some LLMs!"
@@ -266,112 +990,211 @@ def process_repository(repo_path, context_size, api_key):
     
     # Load the existing hash cache to skip unchanged files
     hash_cache = load_hash_cache()
+    # Load the chunk cache to reuse summaries of unchanged chunks in changed files
+    chunk_cache = load_chunk_cache()
+    # Partial files left by interrupted runs; removed once this run completes
+    stale_partials = partial_summary_files()
+    if resume:
+        # Reuse chunks already summarized by an interrupted run
+        resumed = load_summary_records()
+        for key, entry in resumed.items():
+            chunk_cache.setdefault(key, entry)
+        console.print(f"[green]Resuming with {len(resumed)} previously summarized chunks[/green]")
+    elif stale_partials:
+        console.print(f"[yellow]⚠️ Found {len(stale_partials)} partial summary file(s) from interrupted runs; they will be replaced by this run (use --resume to reuse them).[/yellow]")
     
     with Progress(
         SpinnerColumn(),
         TextColumn("[bold blue]{task.description}"),
         BarColumn(),
         TaskProgressColumn(),
-        console=console
-    ) as progress:
+        console=console,
+        refresh_per_second=4
+    ) as progress, SummaryWriter() as writer:
         # Scan repository task
         scan_task = progress.add_task("[cyan]🔍 Scanning repository...", total=None)
-        files = scan_repo(repo_path)
+        file_entries, repo_structure = walk_repo(repo_path)
+        files = [file_path for file_path, _ in file_entries]
         progress.update(scan_task, total=1, completed=1)
         console.print(f"[green]✨ Found {len(files)} source files to analyze![/green]")
+
+        # Hash and chunk all files up front, in worker processes for larger repos
+        prepare_task = progress.add_task("[cyan]🔑 Hashing and chunking files...", total=len(files))
+        known_hashes = {}
+        if io_uring:
+            known_hashes = hash_files_io_uring(file_entries)
+            if known_hashes is None:
+                console.print("[yellow]⚠️ io_uring is not available; hashing without it instead.[/yellow]")
+                known_hashes = {}
+        cached_hashes = {f: data.get("hash") for f, data in hash_cache.items()}
+        file_meta = []
+        for meta in prepare_files(
+            [(f, st.st_size, known_hashes.get(f)) for f, st in file_entries],
+            cached_hashes
+        ):
+            file_meta.append(meta)
+            progress.update(prepare_task, advance=1)
         
         overall_task = progress.add_task("[cyan]📝 Processing files...", total=len(files))
-        combined_summaries = []
+        file_summaries = {}    # file -> list of {chunk_id, summary, snippets}
+        changed_hashes = {}    # file -> new hash, for files that need re-summarizing
+        pending = []           # flat list of (file, chunk_id, chunk_text, chunk_hash) to summarize
+        pending_flags = {}     # chunk_hash -> classify_chunk() flags, reused by the model router
         
-        for f in files:
-            file_task = progress.add_task(
-                f"[yellow]Processing {os.path.basename(f)}...",
-                total=1
-            )
+        for f, current_hash, chunks in file_meta:
+            progress.update(overall_task, description=f"[cyan]📝 Processing {os.path.basename(f)}...")
 
-            # Calculate current file hash
-            current_hash = calculate_file_hash(f)
-            old_hash_data = hash_cache.get(f, {})
-            old_hash = old_hash_data.get("hash")
-            old_summaries = old_hash_data.get("summaries", [])
-
-            if current_hash and current_hash == old_hash:
+            if chunks is None:
                 # File unchanged => reuse old summaries
-                progress.update(file_task, description="[green]Skipping unchanged file[/green]")
-                for s in old_summaries:
-                    combined_summaries.append({
-                        "file": f,
+                old_summaries = hash_cache[f].get("summaries", [])
+                file_summaries[f] = [
+                    {
                         "chunk_id": s["chunk_id"],
                         "summary": s["summary"],
                         "snippets": s.get("snippets", [])
-                    })
+                    }
+                    for s in old_summaries
+                ]
+                for entry in file_summaries[f]:
+                    writer.write(f, entry)
             else:
-                # File changed or not in cache => re-summarize
-                chunks = chunk_file(f, lines_per_chunk=30)
-                new_summaries = []
+                changed_hashes[f] = current_hash
+                if is_generated_file(chunks):
+                    # Generated file => one local placeholder record instead of a record per chunk
+                    file_summaries[f] = [{"chunk_id": 0, "summary": GENERATED_SUMMARY, "snippets": []}]
+                    writer.write(f, file_summaries[f][0])
+                    progress.update(overall_task, advance=1)
+                    continue
+                # File changed or not in cache => reuse cached chunks, queue the rest
+                file_summaries[f] = [None] * len(chunks)
+                ext = os.path.splitext(f)[1].lower()
                 for idx, chunk_content in enumerate(chunks):
-                    chunk_task = progress.add_task(
-                        f"[blue]Analyzing chunk {idx+1}/{len(chunks)}...",
-                        total=1
-                    )
-                    result = summarize_chunk(chunk_content, progress)
-                    summary_text = result["summary"]
-                    snippets = result["snippets"]
-                    
-                    new_summaries.append({
-                        "chunk_id": idx,
-                        "summary": summary_text,
-                        "snippets": snippets
-                    })
-                    combined_summaries.append({
-                        "file": f,
-                        "chunk_id": idx,
-                        "summary": summary_text,
-                        "snippets": snippets
-                    })
-                    
-                    progress.update(chunk_task, completed=1)
-                    progress.remove_task(chunk_task)
-                # Update hash_cache after summarizing
-                hash_cache[f] = {
-                    "hash": current_hash,
-                    "summaries": new_summaries
-                }
-            
-            progress.update(file_task, completed=1)
-            progress.remove_task(file_task)
+                    # Trivial chunks are summarized locally without an API call
+                    cheap = cheap_summary(chunk_content, ext)
+                    if cheap:
+                        file_summaries[f][idx] = {
+                            "chunk_id": idx,
+                            "summary": cheap,
+                            "snippets": []
+                        }
+                        writer.write(f, file_summaries[f][idx])
+                        continue
+                    key = chunk_hash(chunk_content)
+                    cached = chunk_cache.get(key)
+                    if cached is not None:
+                        file_summaries[f][idx] = {
+                            "chunk_id": idx,
+                            "summary": cached["summary"],
+                            "snippets": cached.get("snippets", [])
+                        }
+                        writer.write(f, file_summaries[f][idx], key)
+                    else:
+                        pending.append((f, idx, chunk_content, key))
+                        pending_flags[key] = classify_chunk(chunk_content)
+
             progress.update(overall_task, advance=1)
+        progress.update(overall_task, description="[cyan]📝 Processing files...")
 
-        # Generate repository structure
-        repo_structure = generate_repo_map(repo_path)
-        
-        # Create combined output structure
-        combined_output = {
+        # Summarize all queued chunks concurrently
+        chunk_task = progress.add_task(
+            f"[yellow]🤔 Analyzing {len(pending)} chunks with AI...[/yellow]",
+            total=len(pending)
+        )
+        semaphore = asyncio.Semaphore(max_workers)
+        limiter = RateLimiter(rpm, tpm)
+
+        # Identical chunks (vendored or generated files) are summarized once and shared
+        waiting = {}   # chunk_hash -> [(file, chunk_id), ...]
+        by_model = {}  # model -> unique chunks routed to it
+        for f, idx, chunk_content, key in pending:
+            if key not in waiting:
+                waiting[key] = []
+                model = choose_model(
+                    chunk_content, os.path.splitext(f)[1].lower(), default_model, escalate_model,
+                    pending_flags[key]
+                )
+                by_model.setdefault(model, []).append((f, idx, chunk_content, key))
+            waiting[key].append((f, idx))
+        # Batches never mix models
+        batches = [
+            (model, batch)
+            for model, chunks in by_model.items()
+            for batch in batch_chunks(chunks, max_tokens=batch_tokens)
+        ]
+        failed_files = set()
+
+        async def summarize_pending(model, batch):
+            async with semaphore:
+                batch_results = await summarize_batch(
+                    [chunk_content for _, _, chunk_content, _ in batch],
+                    limiter,
+                    model
+                )
+            # Place each result under its chunk_id in every file sharing that chunk
+            for (_, _, _, key), result in zip(batch, batch_results):
+                if result is None:
+                    failed_files.update(f for f, _ in waiting[key])
+                    continue
+                chunk_cache[key] = result
+                for f, idx in waiting[key]:
+                    file_summaries[f][idx] = {
+                        "chunk_id": idx,
+                        "summary": result["summary"],
+                        "snippets": result["snippets"]
+                    }
+                    writer.write(f, file_summaries[f][idx], key)
+            progress.update(chunk_task, advance=sum(len(waiting[key]) for _, _, _, key in batch))
+
+        get_client(api_key)
+        try:
+            await asyncio.gather(*(summarize_pending(model, b) for model, b in batches))
+        finally:
+            await close_client()
+        for f, current_hash in changed_hashes.items():
+            # Only cache fully summarized files so failed chunks are retried next run
+            if f in failed_files:
+                continue
+            hash_cache[f] = {
+                "hash": current_hash,
+                "summaries": file_summaries[f]
+            }
+        if failed_files:
+            console.print(f"[yellow]⚠️ {len(failed_files)} file(s) had chunks that could not be summarized; they will be retried on the next run.[/yellow]")
+
+        # Save the manifest describing the streamed summaries
+        manifest = {
             "repository_map": repo_structure,
-            "file_summaries": combined_summaries,
+            "summaries_file": os.path.basename(SUMMARIES_OUTPUT),
             "metadata": {
                 "generated_at": datetime.datetime.now().isoformat(),
                 "max_depth": 5,
+                "summary_count": writer.count,
                 "repo_ghost_version": "1.1"
             }
         }
+        write_json_file(SUMMARIES_MANIFEST, manifest)
 
-        # Save combined output in the summary folder
-        with open(SUMMARIES_OUTPUT, "w", encoding="utf-8") as f:
-            json.dump(combined_output, f, indent=2)
-
-        # Save the updated hash cache in the summary folder
+        # Save the updated hash and chunk caches in the summary folder
         save_hash_cache(hash_cache)
+        save_chunk_cache(chunk_cache)
 
-        # Copy the latest summary to the clipboard
-        if combined_summaries:
-            latest_summary = combined_summaries[-1]["summary"]
+        if writer.latest is None:
+            console.print("[red]⚠️ No summaries generated or found.[/red]")
+        elif copy_to_clipboard and sys.stdout.isatty():
+            # Copy the latest summary to the clipboard (interactive runs only)
+            import pyperclip
+
+            latest_summary = writer.latest
             pyperclip.copy(latest_summary)
             console.print("\n[bold green]📋 Latest summary has been copied to your clipboard![/bold green]")
             preview = latest_summary[:200] + "..." if len(latest_summary) > 200 else latest_summary
             console.print(Panel(preview))
         else:
-            console.print("[red]⚠️ No summaries generated or found.[/red]")
+            console.print(f"[green]✅ Wrote {writer.count} summaries to {SUMMARIES_OUTPUT}[/green]")
+
+    # Every chunk is now in the chunk cache and the new summaries file
+    for partial_path in stale_partials:
+        os.remove(partial_path)
 
 def main():
     parser = argparse.ArgumentParser(
@@ -386,6 +1209,15 @@ def main():
     )
     parser.add_argument("--context-size", "-c", type=int, default=8192, help="Specify the context size in number of characters to include in file snippets. Maximum allowed is 32768.")
     parser.add_argument("--api-key", type=str, default=None, help="OpenAI API key. If not provided, the tool checks the OPENAI_API_KEY environment variable or config file (~/.repoghostconfig.json).")
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS, help=f"Maximum number of concurrent OpenAI requests (default: {DEFAULT_MAX_WORKERS}).")
+    parser.add_argument("--rpm", type=int, default=DEFAULT_RPM, help=f"Requests per minute allowed by your OpenAI account (default: {DEFAULT_RPM}).")
+    parser.add_argument("--tpm", type=int, default=DEFAULT_TPM, help=f"Tokens per minute allowed by your OpenAI account (default: {DEFAULT_TPM}).")
+    parser.add_argument("--io-uring", action="store_true", help="Hash small files using batched io_uring reads (Linux only; requires the liburing package). Falls back to regular file reads if unavailable.")
+    parser.add_argument("--resume", action="store_true", help="Reuse chunk summaries written to summary/summaries.jsonl by a previous, interrupted run.")
+    parser.add_argument("--default-model", type=str, default=DEFAULT_MODEL, help=f"OpenAI model for short, simple chunks (default: {DEFAULT_MODEL}).")
+    parser.add_argument("--escalate-model", type=str, default=ESCALATE_MODEL, help=f"OpenAI model for long or complex chunks (default: {ESCALATE_MODEL}).")
+    parser.add_argument("--no-clipboard", action="store_true", help="Do not copy the latest summary to the clipboard or show its preview. This is automatic when output is not a terminal.")
+    parser.add_argument("--batch-tokens", type=int, default=DEFAULT_BATCH_TOKENS, help=f"Token budget for the chunks packed into a single OpenAI request. Use 1 to send every chunk separately (default: {DEFAULT_BATCH_TOKENS}).")
 
     # Parse arguments
     args = parser.parse_args()
@@ -413,6 +1245,11 @@ def main():
     if args.context_size <= 0 or args.context_size > 32768:
         print("Error: Context size must be a positive integer not exceeding 32768.")
         sys.exit(1)
+
+    # Validate concurrency
+    if args.max_workers <= 0 or args.rpm <= 0 or args.tpm <= 0 or args.batch_tokens <= 0:
+        console.print("[red]Error: --max-workers, --rpm, --tpm and --batch-tokens must be positive integers.[/red]")
+        sys.exit(1)
     
     # Verify path exists
     if not os.path.exists(args.repo_path):
@@ -423,7 +1260,13 @@ def main():
         console.print(f"[red]Error: Path is not a directory: {args.repo_path}[/red]")
         sys.exit(1)
     
-    process_repository(args.repo_path, args.context_size, args.api_key)
+    process_repository(
+        args.repo_path, args.context_size, args.api_key,
+        max_workers=args.max_workers, rpm=args.rpm, tpm=args.tpm,
+        batch_tokens=args.batch_tokens, io_uring=args.io_uring,
+        resume=args.resume, default_model=args.default_model,
+        escalate_model=args.escalate_model, copy_to_clipboard=not args.no_clipboard
+    )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,6 +1,10 @@
 import os
+import json
+import asyncio
+from types import SimpleNamespace
 import pytest
-from repoGhost.cli import valid_source_file, calculate_file_hash, scan_repo
+from repoGhost import cli
+from repoGhost.cli import valid_source_file, calculate_file_hash, scan_repo, walk_repo, chunk_file, RateLimiter, batch_chunks, count_tokens, cheap_summary, choose_model, classify_chunk, is_generated_file
 
 def test_valid_source_file():
     assert valid_source_file("test.py") == True
@@ -28,3 +32,454 @@ def test_scan_repo(tmp_path):
     files = scan_repo(str(tmp_path))
     assert len(files) == 1
     assert str(files[0]).endswith("test.py")
+
+def test_walk_repo(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "mod.py").write_text("x = 1\n")
+    (tmp_path / "node_modules").mkdir()
+    (tmp_path / "node_modules" / "lib.js").write_text("var x;")
+
+    files, repo_map = walk_repo(str(tmp_path))
+    assert [os.path.basename(path) for path, _ in files] == ["mod.py"]
+    assert files[0][1].st_size == 6
+    assert repo_map["children"] == [{
+        "name": "pkg",
+        "type": "directory",
+        "path": "pkg",
+        "children": [{"name": "mod.py", "type": "file", "path": os.path.join("pkg", "mod.py")}]
+    }]
+
+def test_walk_repo_skips_non_regular_files(tmp_path):
+    (tmp_path / "real.js").mkdir()
+    (tmp_path / "real.js" / "index.txt").write_text("not source\n")
+    (tmp_path / "link.js").symlink_to(tmp_path / "real.js", target_is_directory=True)
+    (tmp_path / "mod.py").write_text("x = 1\n")
+
+    files, repo_map = walk_repo(str(tmp_path))
+    assert [os.path.basename(path) for path, _ in files] == ["mod.py"]
+    assert "link.js" not in [child["name"] for child in repo_map["children"]]
+
+def test_hash_files_io_uring(tmp_path):
+    pytest.importorskip("liburing")
+    for i in range(5):
+        (tmp_path / f"f{i}.py").write_text("x = %d\n" % i * i)
+    files, _ = walk_repo(str(tmp_path))
+
+    hashes = cli.hash_files_io_uring(files)
+    if hashes is None:
+        pytest.skip("io_uring not available on this system")
+    assert hashes == {path: calculate_file_hash(path) for path, _ in files}
+
+def test_hash_files_io_uring_many_files(tmp_path):
+    pytest.importorskip("liburing")
+    # More than two full batches, ending on a partial one, so the completion queue wraps
+    count = 2 * cli.IO_URING_QUEUE_DEPTH + 57
+    for i in range(count):
+        (tmp_path / f"f{i}.py").write_text(f"x = {i}\n")
+    files, _ = walk_repo(str(tmp_path))
+
+    hashes = cli.hash_files_io_uring(files)
+    if hashes is None:
+        pytest.skip("io_uring not available on this system")
+    assert len(hashes) == count
+    assert hashes == {path: calculate_file_hash(path) for path, _ in files}
+
+def test_hash_files_io_uring_closes_fds_on_failure(tmp_path, monkeypatch):
+    pytest.importorskip("liburing")
+    for i in range(20):
+        (tmp_path / f"f{i}.py").write_text(f"x = {i}\n")
+    files, _ = walk_repo(str(tmp_path))
+
+    def failing_read(*args):
+        raise OSError("read failed")
+
+    monkeypatch.setattr(cli.liburing, "io_uring_prep_read", failing_read)
+    before = len(os.listdir("/proc/self/fd"))
+    hashes = cli.hash_files_io_uring(files)
+    if hashes is None:
+        pytest.skip("io_uring not available on this system")
+    assert hashes == {}
+    assert len(os.listdir("/proc/self/fd")) == before
+
+def test_summary_writer_resume(tmp_path):
+    path = str(tmp_path / "summaries.jsonl")
+    with cli.SummaryWriter(path) as writer:
+        writer.write("a.py", {"chunk_id": 0, "summary": "local", "snippets": []})
+        writer.write("a.py", {"chunk_id": 1, "summary": "remote", "snippets": ["x"]}, "abc")
+    assert writer.count == 2
+    assert writer.latest == "remote"
+
+    # Simulate a crash that cut the last record short
+    with open(path, "ab") as f:
+        f.write(b'{"file": "b.py", "chunk_id"')
+
+    assert cli.load_summary_records(path) == {"abc": {"summary": "remote", "snippets": ["x"]}}
+
+def test_summary_writer_output_mode_follows_umask(tmp_path):
+    path = str(tmp_path / "summaries.jsonl")
+    old_umask = os.umask(0o022)
+    try:
+        with cli.SummaryWriter(path) as writer:
+            writer.write("a.py", {"chunk_id": 0, "summary": "s", "snippets": []})
+    finally:
+        os.umask(old_umask)
+    assert os.stat(path).st_mode & 0o777 == 0o644
+
+def test_summary_writer_keeps_output_when_interrupted(tmp_path):
+    path = str(tmp_path / "summaries.jsonl")
+    with cli.SummaryWriter(path) as writer:
+        writer.write("a.py", {"chunk_id": 0, "summary": "first", "snippets": []}, "abc")
+
+    # An interrupted run must not destroy the records it would resume from
+    with pytest.raises(KeyboardInterrupt):
+        with cli.SummaryWriter(path) as writer:
+            writer.write("b.py", {"chunk_id": 0, "summary": "second", "snippets": []}, "def")
+            raise KeyboardInterrupt
+
+    assert len(cli.partial_summary_files(path)) == 1
+    assert cli.load_summary_records(path) == {
+        "abc": {"summary": "first", "snippets": []},
+        "def": {"summary": "second", "snippets": []},
+    }
+
+def test_prepare_files(tmp_path):
+    changed = tmp_path / "changed.py"
+    changed.write_text("a = 1\nb = 2\n")
+    unchanged = tmp_path / "unchanged.py"
+    unchanged.write_text("c = 3\n")
+    cached = {str(unchanged): calculate_file_hash(str(unchanged))}
+
+    items = [(str(changed), 12, None), (str(unchanged), 6, None)]
+    results = list(cli.prepare_files(items, cached))
+    assert results == [
+        (str(changed), calculate_file_hash(str(changed)), ["a = 1\nb = 2\n"]),
+        (str(unchanged), cached[str(unchanged)], None),
+    ]
+
+def test_prepare_files_small_repo_stays_in_process(tmp_path, monkeypatch):
+    items = []
+    for i in range(100):
+        path = tmp_path / f"f{i}.py"
+        path.write_text(f"x = {i}\n")
+        items.append((str(path), path.stat().st_size, None))
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("process pool used for a small repo")
+
+    monkeypatch.setattr(cli.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(cli.multiprocessing, "get_context", no_pool)
+    results = list(cli.prepare_files(items, {}))
+    assert [r[0] for r in results] == [item[0] for item in items]
+    assert results[5][2] == ["x = 5\n"]
+
+def test_rate_limiter():
+    async def run():
+        limiter = RateLimiter(rpm=60, tpm=1000)
+        # The bucket starts full, so these reserve without waiting
+        await limiter.acquire(400)
+        await limiter.acquire(400)
+        return limiter._requests, limiter._tokens
+
+    requests, tokens = asyncio.run(run())
+    assert requests == pytest.approx(58, abs=0.1)
+    assert tokens == pytest.approx(200, abs=1)
+
+def test_batch_chunks():
+    text = "x = 1\n" * 20
+    budget = count_tokens(text) * 2
+    chunks = [("a.py", i, text) for i in range(5)]
+
+    batches = batch_chunks(chunks, max_tokens=budget)
+    assert [len(b) for b in batches] == [2, 2, 1]
+    assert [item for b in batches for item in b] == chunks
+
+    # Oversized chunks still get a batch of their own
+    assert batch_chunks(chunks, max_tokens=1) == [[c] for c in chunks]
+
+    # The chunk count is capped as well as the token budget
+    assert [len(b) for b in batch_chunks(chunks, max_tokens=10**6, max_chunks=2)] == [2, 2, 1]
+
+def _fake_client(reply):
+    """
+    Build a stand-in for AsyncOpenAI whose completions come from reply(kwargs).
+    Every request's kwargs are recorded on client.calls.
+    """
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        message = SimpleNamespace(content=reply(kwargs))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    return SimpleNamespace(calls=calls, chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+def test_summarize_batch_retries_missing_chunks(monkeypatch):
+    def reply(kwargs):
+        if "response_format" in kwargs:
+            # String ids are accepted; chunk 1 is missing from the reply
+            return json.dumps({"results": [{"id": "0", "summary": "first", "snippets": []},
+                                           {"id": 2, "summary": "third", "snippets": []}]})
+        return json.dumps({"summary": "single", "snippets": ["y"]})
+
+    client = _fake_client(reply)
+    monkeypatch.setattr(cli, "get_client", lambda api_key=None: client)
+    results = asyncio.run(cli.summarize_batch(["a", "b", "c"], RateLimiter(rpm=6000, tpm=10**6), "m"))
+
+    assert [r["summary"] for r in results] == ["first", "single", "third"]
+    assert len(client.calls) == 2
+    assert client.calls[0]["max_tokens"] == cli.BATCH_OUTPUT_TOKENS_PER_CHUNK * 3
+
+def test_summarize_batch_does_not_retry_chunks_after_transient_failure(monkeypatch):
+    import httpx
+    from openai import APIConnectionError
+
+    def unreachable(kwargs):
+        raise APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+
+    monkeypatch.setattr(cli, "BACKOFF_BASE", 0)
+    monkeypatch.setattr(cli.random, "random", lambda: 0.0)
+    client = _fake_client(unreachable)
+    monkeypatch.setattr(cli, "get_client", lambda api_key=None: client)
+    chunks = [f"chunk {i}" for i in range(16)]
+    results = asyncio.run(cli.summarize_batch(chunks, RateLimiter(rpm=6000, tpm=10**6), "m"))
+
+    assert results == [None] * 16
+    assert len(client.calls) == cli.MAX_RETRIES
+
+def test_summarize_batch_splits_rejected_batch(monkeypatch):
+    import httpx
+    from openai import BadRequestError
+
+    def reply(kwargs):
+        if "response_format" in kwargs:
+            request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+            raise BadRequestError("context length exceeded", response=httpx.Response(400, request=request), body=None)
+        return json.dumps({"summary": "single", "snippets": []})
+
+    client = _fake_client(reply)
+    monkeypatch.setattr(cli, "get_client", lambda api_key=None: client)
+    results = asyncio.run(cli.summarize_batch(["a", "b"], RateLimiter(rpm=6000, tpm=10**6), "m"))
+
+    assert [r["summary"] for r in results] == ["single", "single"]
+    assert len(client.calls) == 3
+
+def test_summarize_batch_falls_back_on_malformed_reply(monkeypatch):
+    def reply(kwargs):
+        if "response_format" in kwargs:
+            return '{"results": [{"id": 0, "summ'  # Truncated JSON
+        return json.dumps({"summary": "single", "snippets": []})
+
+    client = _fake_client(reply)
+    monkeypatch.setattr(cli, "get_client", lambda api_key=None: client)
+    results = asyncio.run(cli.summarize_batch(["a", "b"], RateLimiter(rpm=6000, tpm=10**6), "m"))
+
+    assert [r["summary"] for r in results] == ["single", "single"]
+    assert len(client.calls) == 3
+
+def test_hash_cache_invalidated_on_algorithm_change(tmp_path, monkeypatch):
+    monkeypatch.setattr(cli, "HASH_CACHE_FILE", str(tmp_path / "hash_cache.json"))
+    entry = {"hash": "abc", "summaries": []}
+
+    cli.save_hash_cache({"a.py": entry})
+    assert cli.load_hash_cache() == {"a.py": entry}
+
+    monkeypatch.setattr(cli, "HASH_ALGORITHM", "other")
+    assert cli.load_hash_cache() == {}
+
+def test_chunk_file(tmp_path):
+    test_file = tmp_path / "test.py"
+    lines = [f"line {i}\n" for i in range(7)]
+    test_file.write_text("".join(lines) + "tail")
+
+    chunks = chunk_file(str(test_file), lines_per_chunk=3)
+    assert chunks == ["".join(lines[0:3]), "".join(lines[3:6]), lines[6] + "tail"]
+
+    test_file.write_text("")
+    assert chunk_file(str(test_file)) == []
+
+def test_cheap_summary():
+    init_py = '"""Package exports."""\nfrom .cli import main\n\n__all__ = ["main"]\n'
+    assert cheap_summary(init_py, ".py") == "Package exports. Imports main. Assigns __all__."
+
+    small_def = 'def add(a, b):\n    """Add two numbers."""\n    return a + b\n'
+    assert cheap_summary(small_def, ".py") == "Defines function add (Add two numbers)."
+
+    # Top-level control flow and partial chunks go to the LLM
+    assert cheap_summary("for i in range(3):\n    print(i)\n", ".py") is None
+    assert cheap_summary("    return x\n", ".py") is None
+
+    # Computed assignments, long assignment blocks and long summaries go to the LLM
+    assert cheap_summary("CONFIG = {'a': compute(x) if x else fallback()}\n", ".py") is None
+    assert cheap_summary("".join(f"X{i} = {i}\n" for i in range(30)), ".py") is None
+    assert cheap_summary('"""' + "word " * 100 + '"""\nimport os\n', ".py") is None
+    # Long import blocks are still summarized locally
+    imports = "".join(f"import mod{i}\n" for i in range(30))
+    assert cheap_summary(imports, ".py").startswith("Imports mod0, mod1")
+
+    assert cheap_summary('{"name": "app", "version": "1.0"}', ".json") == "JSON with keys: name, version"
+    assert cheap_summary('{"name": ', ".json") is None
+    assert cheap_summary("<html><title>Home</title></html>", ".html") == "HTML with heading(s): Home"
+    assert cheap_summary("const x = 1;", ".js") is None
+
+def test_choose_model():
+    assert choose_model("x = 1\n", ".py", "small", "large") == "small"
+    # Many AST nodes escalate even when the chunk is short
+    complex_py = "def f(a):\n    return [i * a for i in range(a) if i % 2 and a > 3]\n" * 3
+    assert choose_model(complex_py, ".py", "small", "large") == "large"
+    # Long chunks escalate regardless of type
+    assert choose_model("var x = 1;\n" * 1000, ".js", "small", "large") == "large"
+
+def test_classify_chunk():
+    assert classify_chunk("x = 1\n") == {"minified": False}
+
+    minified = "var a=1;" * 100
+    flags = classify_chunk(minified)
+    assert flags["minified"]
+    assert choose_model(minified * 10, ".js", "small", "large", flags) == "small"
+
+def test_is_generated_file():
+    generated = ["// Code generated by protoc-gen-go. DO NOT EDIT.\npackage pb\n", "var x = 1;\n"]
+    assert is_generated_file(generated)
+    assert is_generated_file(["# @generated by tool\n"])
+    assert is_generated_file(["/**\n * @generated\n */\n"])
+    assert is_generated_file(["<!-- DO NOT EDIT -->\n<html></html>\n"])
+
+    # Markers must open a comment line; prose mentioning them does not count
+    assert not is_generated_file(['"""Utilities for building auto-generated API clients."""\n'])
+    assert not is_generated_file(["# NOTE: DO NOT EDIT settings below without approval\n"])
+    assert not is_generated_file(["/**\n * Renders the auto-generated table of contents.\n */\n"])
+    assert not is_generated_file(["def check():\n    # Do not edit the token below\n    return TOKEN\n"])
+
+    # Markers only count in the file header
+    body = "".join(f"x{i} = {i}\n" for i in range(cli.GENERATED_HEADER_LINES))
+    assert not is_generated_file([body + "# DO NOT EDIT\n"])
+    assert not is_generated_file(["x = 1\n", "# DO NOT EDIT\n"])
+    assert not is_generated_file([])
+
+def _js_chunk(name):
+    return "".join(f"if ({name}{i}) {{ run{i}(); }}\n" for i in range(cli.LINES_PER_CHUNK))
+
+def _run_pipeline(tmp_path, monkeypatch, client, **kwargs):
+    """
+    Run process_repository on tmp_path/repo with a fake client. The summary
+    folder paths are relative, so they resolve under tmp_path.
+    """
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(cli.SUMMARY_DIR, exist_ok=True)
+    monkeypatch.setattr(cli, "get_client", lambda api_key=None: client)
+    cli.process_repository(str(tmp_path / "repo"), 1000, "key", copy_to_clipboard=False, **kwargs)
+    return cli.load_hash_cache(), cli.load_chunk_cache()
+
+def _summary_reply(kwargs):
+    # Summarize a chunk as its first line, so results can be matched to chunks
+    chunk = kwargs["messages"][0]["content"].split("Code chunk:\n", 1)[1]
+    return json.dumps({"summary": chunk.splitlines()[0], "snippets": []})
+
+def test_pipeline_dedupes_chunks_and_orders_by_chunk_id(tmp_path, monkeypatch):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    content = _js_chunk("a") + _js_chunk("b")
+    (repo / "one.js").write_text(content)
+    (repo / "two.js").write_text(content)
+
+    client = _fake_client(_summary_reply)
+    hash_cache, chunk_cache = _run_pipeline(tmp_path, monkeypatch, client, batch_tokens=1)
+
+    # Each distinct chunk costs one API call, however many files share it
+    assert len(client.calls) == 2
+    assert len(chunk_cache) == 2
+    for name in ("one.js", "two.js"):
+        summaries = hash_cache[str(repo / name)]["summaries"]
+        assert [s["chunk_id"] for s in summaries] == [0, 1]
+        assert [s["summary"] for s in summaries] == ["if (a0) { run0(); }", "if (b0) { run0(); }"]
+
+    # Unchanged files are not sent again
+    client = _fake_client(_summary_reply)
+    _run_pipeline(tmp_path, monkeypatch, client, batch_tokens=1)
+    assert client.calls == []
+
+def test_pipeline_does_not_cache_failed_chunks(tmp_path, monkeypatch):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "good.js").write_text(_js_chunk("good"))
+    (repo / "bad.js").write_text(_js_chunk("keep") + _js_chunk("fail"))
+
+    def flaky_reply(kwargs):
+        if "if (fail0)" in kwargs["messages"][0]["content"]:
+            raise ValueError("malformed response")
+        return _summary_reply(kwargs)
+
+    hash_cache, chunk_cache = _run_pipeline(tmp_path, monkeypatch, _fake_client(flaky_reply), batch_tokens=1)
+    assert str(repo / "good.js") in hash_cache
+    assert str(repo / "bad.js") not in hash_cache
+    assert cli.chunk_hash(_js_chunk("fail")) not in chunk_cache
+    assert cli.chunk_hash(_js_chunk("keep")) in chunk_cache
+
+    # The next run only re-sends the chunk that failed
+    client = _fake_client(_summary_reply)
+    hash_cache, _ = _run_pipeline(tmp_path, monkeypatch, client, batch_tokens=1)
+    assert len(client.calls) == 1
+    assert [s["summary"] for s in hash_cache[str(repo / "bad.js")]["summaries"]] == [
+        "if (keep0) { run0(); }", "if (fail0) { run0(); }"
+    ]
+
+def test_request_completion_reserves_output_tokens():
+    class RecordingLimiter:
+        def __init__(self):
+            self.reserved = []
+
+        async def acquire(self, tokens):
+            self.reserved.append(tokens)
+
+    client = _fake_client(lambda kwargs: "{}")
+    limiter = RecordingLimiter()
+    messages = [{"role": "user", "content": "hello there"}]
+    asyncio.run(cli._request_completion(client, limiter, model="m", messages=messages, max_tokens=1000))
+    asyncio.run(cli._request_completion(client, limiter, model="m", messages=messages))
+
+    prompt = count_tokens("hello there")
+    assert limiter.reserved == [prompt + 1000, prompt + cli.OUTPUT_TOKENS_ESTIMATE]
+
+def test_request_completion_stops_after_max_retries(monkeypatch):
+    import httpx
+    from openai import APIConnectionError
+
+    def unreachable(kwargs):
+        raise APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+
+    monkeypatch.setattr(cli, "BACKOFF_BASE", 0)
+    monkeypatch.setattr(cli.random, "random", lambda: 0.0)
+    client = _fake_client(unreachable)
+    with pytest.raises(APIConnectionError):
+        asyncio.run(cli._request_completion(
+            client, RateLimiter(rpm=6000, tpm=10**6),
+            model="m", messages=[{"role": "user", "content": "hi"}]
+        ))
+    assert len(client.calls) == cli.MAX_RETRIES
+
+def test_pipeline_writes_one_record_for_generated_files(tmp_path, monkeypatch):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "gen.js").write_text("// Code generated by tool. DO NOT EDIT.\n" + _js_chunk("a") + _js_chunk("b"))
+
+    client = _fake_client(_summary_reply)
+    hash_cache, _ = _run_pipeline(tmp_path, monkeypatch, client)
+    assert client.calls == []
+    assert hash_cache[str(repo / "gen.js")]["summaries"] == [
+        {"chunk_id": 0, "summary": cli.GENERATED_SUMMARY, "snippets": []}
+    ]
+    with open(cli.SUMMARIES_OUTPUT) as f:
+        assert len(f.readlines()) == 1
+
+def test_pipeline_removes_stale_partials(tmp_path, monkeypatch):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "one.js").write_text(_js_chunk("a"))
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(cli.SUMMARY_DIR, exist_ok=True)
+    stale = tmp_path / (cli.SUMMARIES_OUTPUT + ".crashed.partial")
+    stale.write_text("")
+
+    _run_pipeline(tmp_path, monkeypatch, _fake_client(_summary_reply))
+    assert not stale.exists()
+    assert cli.partial_summary_files() == []